@@ -24,33 +24,46 @@ defmodule AgentHarness.Agent do
     }
   end
 
-  alias AgentHarness.{API, Names, ToolSet}
+  alias AgentHarness.{API, Names, ToolRegistry, ToolSet}
   alias AgentHarness.Tools.{CreateTool, SpawnAgent}
 
   # Maximum nesting depth for drone spawning (also referenced by SpawnAgent tool description)
   @max_depth 3
   def max_depth, do: @max_depth
 
+  # Read-only built-in tools that are safe to run concurrently when the model
+  # issues several of them in one turn.
+  @concurrent_tools ["read_file", "list_files", "search_files"]
+  @max_tool_concurrency 8
+
   defstruct [
     :id,
     :name,
     :parent,
     :api_key,
+    :api_url,
     :api_module,
     :model,
     :system,
     :tool_table,
+    :dynamic_tools,
     :caller,
+    :last_assistant_text,
     tier: :mind,
+    blocked_tools: [],
     depth: 0,
     messages: [],
     max_turns: 50,
     resources: %{},
     pending_drones: %{},
     completed_drones: [],
-    event_log: []
+    event_log: [],
+    event_log_size: 0
   ]
 
+  # The event log keeps the newest @max_event_log events. It is allowed to grow
+  # to twice that before being trimmed, so emit/3 is amortized O(1) instead of
+  # copying the whole log on every event.
   @max_event_log 500
 
   # --- Public API ---
@@ -105,6 +118,7 @@ defmodule AgentHarness.Agent do
     agent_name = opts[:agent_name] || Names.generate()
     tier = opts[:tier] || :mind
     parent = opts[:parent]
+    depth = opts[:depth] || 0
 
     # Register metadata in the Registry for list_agents lookups
     Registry.update_value(AgentHarness.AgentRegistry, id, fn _ ->
@@ -115,15 +129,23 @@ defmodule AgentHarness.Agent do
 
     resources = opts[:resources] || %{}
 
+    {api_key, api_url} =
+      API.provider(
+        api_key: opts[:api_key] || System.get_env("ANTHROPIC_API_KEY"),
+        api_url: opts[:api_url]
+      ) || {nil, nil}
+
     state = %__MODULE__{
       id: id,
       name: agent_name,
       parent: parent,
       tier: tier,
-      depth: opts[:depth] || 0,
-      api_key: opts[:api_key] || System.get_env("ANTHROPIC_API_KEY"),
+      depth: depth,
+      blocked_tools: blocked_tools(depth, tier),
+      api_key: api_key,
+      api_url: api_url,
       api_module: opts[:api_module] || API,
-      model: opts[:model] || "claude-sonnet-4-20250514",
+      model: opts[:model] || API.default_model(),
       system: opts[:system],
       max_turns: opts[:max_turns] || 50,
       resources: resources,
@@ -162,7 +184,7 @@ defmodule AgentHarness.Agent do
   end
 
   def handle_call(:get_events, _from, state) do
-    {:reply, state.event_log, state}
+    {:reply, Enum.take(state.event_log, @max_event_log), state}
   end
 
   @impl true
@@ -216,17 +238,20 @@ defmodule AgentHarness.Agent do
   end
 
   defp run_loop(state, turn, caller) do
-    state = drain_drone_events(state)
-    tools = tools_for_agent(ToolSet.all_definitions(state.tool_table), state)
+    state = state |> drain_drone_events() |> cache_dynamic_tools()
+    tools = tools_for_agent(ToolRegistry.all_definitions(), state) ++ state.dynamic_tools
 
     case state.api_module.chat(state.messages, tools,
            api_key: state.api_key,
+           api_url: state.api_url,
            model: state.model,
            system: state.system
          ) do
       {:ok, response} ->
-        state = append_assistant_message(state, response)
-        handle_response(state, response, turn, caller)
+        content = Map.get(response, "content", [])
+        {text, tool_uses} = split_content(content)
+        state = append_assistant_message(state, content, text)
+        handle_response(state, text, tool_uses, turn, caller)
 
       {:error, reason} ->
         state = emit(state, caller, {:error, reason})
@@ -235,55 +260,91 @@ defmodule AgentHarness.Agent do
     end
   end
 
-  defp handle_response(state, response, turn, caller) do
-    content = Map.get(response, "content", [])
-    tool_uses = Enum.filter(content, &(&1["type"] == "tool_use"))
-
+  defp handle_response(state, text, tool_uses, turn, caller) do
     if tool_uses == [] do
-      text = text_from_content(content)
-
-      state = emit(state, caller, {:text, text})
+      # An empty final text carries nothing for subscribers; :done still closes the turn.
+      state = if text == "", do: state, else: emit(state, caller, {:text, text})
       state = emit(state, caller, :done)
       {{:ok, text}, state}
     else
       {tool_results, state} =
-        Enum.map_reduce(tool_uses, state, fn tool_use, acc_state ->
-          name = tool_use["name"]
-          input = tool_use["input"]
-          id = tool_use["id"]
-          acc_state = drain_drone_events(acc_state)
-
-          Logger.info("[tool_use] #{name}: #{inspect(input)}")
-          acc_state = emit(acc_state, caller, {:tool_use, name, input})
-
-          {status, output, acc_state} = execute_tool(acc_state, name, input)
-
-          acc_state =
-            case status do
-              :ok ->
-                Logger.info("[tool_result] #{name}: #{String.slice(output, 0..200)}")
-                emit(acc_state, caller, {:tool_result, name, output})
-
-              :error ->
-                Logger.warning("[tool_error] #{name}: #{output}")
-                emit(acc_state, caller, {:tool_result, name, "[error] #{output}"})
-            end
-
-          result = %{
-            "type" => "tool_result",
-            "tool_use_id" => id,
-            "content" => String.replace_invalid(output)
-          }
-
-          result = if status == :error, do: Map.put(result, "is_error", true), else: result
-          {result, acc_state}
-        end)
+        tool_uses
+        |> Enum.chunk_by(&(&1["name"] in @concurrent_tools))
+        |> Enum.flat_map_reduce(state, &run_tool_batch(&2, &1, caller))
 
       state = append_tool_results(state, tool_results)
       run_loop(state, turn + 1, caller)
     end
   end
 
+  # A consecutive run of read-only tool calls executes concurrently; all other
+  # calls run one at a time, in order, since they may depend on earlier ones.
+  defp run_tool_batch(state, [%{"name" => name}, _ | _] = batch, caller)
+       when name in @concurrent_tools do
+    state = drain_drone_events(state)
+    state = Enum.reduce(batch, state, &emit_tool_use(&2, caller, &1))
+
+    # Bind only what the tasks need, so the message history and event log are
+    # not copied into every task.
+    %{tool_table: table, resources: resources} = state
+
+    outputs =
+      AgentHarness.TaskSupervisor
+      |> Task.Supervisor.async_stream_nolink(
+        batch,
+        fn tool_use ->
+          ToolSet.execute(table, tool_use["name"], tool_use["input"], resources)
+        end,
+        max_concurrency: @max_tool_concurrency,
+        timeout: :infinity
+      )
+      |> Enum.map(fn
+        {:ok, result} -> result
+        {:exit, reason} -> {:error, "Tool crashed: #{inspect(reason)}"}
+      end)
+
+    batch
+    |> Enum.zip(outputs)
+    |> Enum.map_reduce(state, fn {tool_use, {status, output}}, acc_state ->
+      tool_result(acc_state, caller, tool_use, status, output)
+    end)
+  end
+
+  defp run_tool_batch(state, batch, caller) do
+    Enum.map_reduce(batch, state, fn tool_use, acc_state ->
+      acc_state = acc_state |> drain_drone_events() |> emit_tool_use(caller, tool_use)
+      {status, output, acc_state} = execute_tool(acc_state, tool_use["name"], tool_use["input"])
+      tool_result(acc_state, caller, tool_use, status, output)
+    end)
+  end
+
+  defp emit_tool_use(state, caller, %{"name" => name, "input" => input}) do
+    Logger.info("[tool_use] #{name}: #{inspect(input)}")
+    emit(state, caller, {:tool_use, name, input})
+  end
+
+  defp tool_result(state, caller, %{"name" => name, "id" => id}, status, output) do
+    state =
+      case status do
+        :ok ->
+          Logger.info("[tool_result] #{name}: #{String.slice(output, 0..200)}")
+          emit(state, caller, {:tool_result, name, output})
+
+        :error ->
+          Logger.warning("[tool_error] #{name}: #{output}")
+          emit(state, caller, {:tool_result, name, "[error] #{output}"})
+      end
+
+    result = %{
+      "type" => "tool_result",
+      "tool_use_id" => id,
+      "content" => String.replace_invalid(output)
+    }
+
+    result = if status == :error, do: Map.put(result, "is_error", true), else: result
+    {result, state}
+  end
+
   # --- Continuation Protocol ---
   # When a drone/mind hits its turn limit, instead of returning an error,
   # we ask for a final summary with no tools available. This preserves
@@ -303,6 +364,7 @@ defmodule AgentHarness.Agent do
     text =
       case state.api_module.chat(wrap_messages, [],
              api_key: state.api_key,
+             api_url: state.api_url,
              model: state.model,
              system: state.system
            ) do
@@ -310,7 +372,7 @@ defmodule AgentHarness.Agent do
           text_from_content(Map.get(response, "content", []))
 
         {:error, _reason} ->
-          extract_last_assistant_text(state) || "No results captured."
+          state.last_assistant_text || "No results captured."
       end
 
     summary = "[partial — turn limit reached]\n\n" <> text
@@ -319,25 +381,24 @@ defmodule AgentHarness.Agent do
     {{:ok, summary}, state}
   end
 
-  defp extract_last_assistant_text(state) do
-    state.messages
-    |> Enum.reverse()
-    |> Enum.find_value(fn
-      %{"role" => "assistant", "content" => content} when is_list(content) ->
-        case text_from_content(content) do
-          "" -> nil
-          text -> text
-        end
+  # Splits response content into its joined text and tool_use blocks in one pass.
+  defp split_content(content) do
+    {texts, tool_uses} =
+      Enum.reduce(content, {[], []}, fn
+        %{"type" => "text", "text" => text}, {texts, uses} -> {[text | texts], uses}
+        %{"type" => "tool_use"} = tool_use, {texts, uses} -> {texts, [tool_use | uses]}
+        _block, acc -> acc
+      end)
 
-      _ ->
-        nil
-    end)
+    {texts |> Enum.reverse() |> Enum.join("\n"), Enum.reverse(tool_uses)}
   end
 
+  # Most final responses are a single text block; skip the comprehension and join.
+  defp text_from_content([%{"type" => "text", "text" => text}]), do: text
+
   defp text_from_content(content) do
-    content
-    |> Enum.filter(&(&1["type"] == "text"))
-    |> Enum.map_join("\n", & &1["text"])
+    texts = for %{"type" => "text", "text" => text} <- content, do: text
+    Enum.join(texts, "\n")
   end
 
   # --- Tool Execution ---
@@ -380,7 +441,8 @@ defmodule AgentHarness.Agent do
           {:error, reason}
       end
 
-    {elem(result, 0), elem(result, 1), state}
+    # A new tool changes this agent's definitions; rebuild them next turn.
+    {elem(result, 0), elem(result, 1), %{state | dynamic_tools: nil}}
   end
 
   defp execute_tool(state, name, input) do
@@ -413,6 +475,7 @@ defmodule AgentHarness.Agent do
              max_turns: max_turns,
              resources: drone_resources,
              api_key: state.api_key,
+             api_url: state.api_url,
              api_module: state.api_module,
              model: state.model
            ) do
@@ -574,7 +637,14 @@ defmodule AgentHarness.Agent do
       DynamicSupervisor.terminate_child(AgentHarness.AgentSupervisor, pid)
     end)
 
-    %{state | messages: [], pending_drones: %{}, completed_drones: [], caller: nil}
+    %{
+      state
+      | messages: [],
+        last_assistant_text: nil,
+        pending_drones: %{},
+        completed_drones: [],
+        caller: nil
+    }
   end
 
   defp format_drone_result({:ok, text}), do: text
@@ -682,18 +752,29 @@ defmodule AgentHarness.Agent do
     end
   end
 
-  # Build the set of tool names this agent cannot use:
+  # Build the set of tool names this agent cannot use. Depth and tier are fixed
+  # for an agent's lifetime, so this is computed once in init/1:
   # - spawn_agent is blocked at max depth (prevents infinite nesting)
   # - create_tool is blocked for all drones (mind-only capability)
-  defp tools_for_agent(tools, %{depth: depth, tier: tier}) do
-    blocked =
-      if(depth >= @max_depth, do: [SpawnAgent.name()], else: []) ++
-        if tier == :drone, do: [CreateTool.name()], else: []
-
-    case blocked do
-      [] -> tools
-      _ -> Enum.reject(tools, &(&1["name"] in blocked))
-    end
+  defp blocked_tools(depth, tier) do
+    if(depth >= @max_depth, do: [SpawnAgent.name()], else: []) ++
+      if tier == :drone, do: [CreateTool.name()], else: []
+  end
+
+  # This agent's own tool table only changes through create_tool (which clears
+  # the cache), so its definitions are read once. The shared ToolRegistry can
+  # gain or lose tools at runtime (register/unregister), so run_loop reads it
+  # every turn; that is a single ETS select.
+  defp cache_dynamic_tools(%{dynamic_tools: nil} = state) do
+    %{state | dynamic_tools: ToolSet.dynamic_definitions(state.tool_table)}
+  end
+
+  defp cache_dynamic_tools(state), do: state
+
+  defp tools_for_agent(tools, %{blocked_tools: []}), do: tools
+
+  defp tools_for_agent(tools, %{blocked_tools: blocked}) do
+    Enum.reject(tools, &(&1["name"] in blocked))
   end
 
   defp emit(state, caller, event) do
@@ -705,8 +786,12 @@ defmodule AgentHarness.Agent do
       {:agent_event, state.id, event}
     )
 
-    log = [event | state.event_log] |> Enum.take(@max_event_log)
-    %{state | event_log: log}
+    if state.event_log_size >= 2 * @max_event_log do
+      log = Enum.take([event | state.event_log], @max_event_log)
+      %{state | event_log: log, event_log_size: @max_event_log}
+    else
+      %{state | event_log: [event | state.event_log], event_log_size: state.event_log_size + 1}
+    end
   end
 
   defp broadcast_lifecycle(state, event) do
@@ -721,9 +806,13 @@ defmodule AgentHarness.Agent do
     %{state | messages: state.messages ++ [msg]}
   end
 
-  defp append_assistant_message(state, response) do
-    msg = %{"role" => "assistant", "content" => Map.get(response, "content", [])}
-    %{state | messages: state.messages ++ [msg]}
+  # Tracks the latest non-empty assistant text as messages are appended, so the
+  # wrap-up fallback doesn't have to rescan the whole history.
+  defp append_assistant_message(state, content, text) do
+    msg = %{"role" => "assistant", "content" => content}
+    last_text = if text == "", do: state.last_assistant_text, else: text
+
+    %{state | messages: state.messages ++ [msg], last_assistant_text: last_text}
   end
 
   defp append_tool_results(state, tool_results) do
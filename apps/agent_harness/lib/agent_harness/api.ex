@@ -5,15 +5,31 @@ defmodule AgentHarness.API do
 
   Set OPENROUTER_API_KEY to use OpenRouter, or ANTHROPIC_API_KEY for direct access.
   OpenRouter takes priority if both are set.
+
+  Requests are streamed and reassembled by `AgentHarness.SSE`, so `chat/3`
+  still returns the complete response message. Extra `Req` options can be
+  given as `:req_options`; tests use this to route requests to a plug.
   """
 
+  alias AgentHarness.SSE
+
   @anthropic_url "https://api.anthropic.com/v1/messages"
   @openrouter_url "https://openrouter.ai/api/v1/messages"
   @api_version "2023-06-01"
+  @default_model "claude-sonnet-4-20250514"
+  @cache_breakpoint %{"type" => "ephemeral"}
+
+  # Responses are streamed, so this bounds the gap between chunks rather than
+  # the whole generation: a stalled connection fails fast, while a long but
+  # healthy response (the API sends periodic pings) is never cut off.
+  @stream_idle_timeout 90_000
+
+  @doc "Returns the model used when no `:model` option is given."
+  def default_model, do: @default_model
 
   def chat(messages, tools, opts \\ []) do
     {api_key, api_url} = resolve_provider(opts)
-    model = opts[:model] || "claude-sonnet-4-20250514"
+    model = opts[:model] || @default_model
     system = opts[:system]
     max_tokens = opts[:max_tokens] || 8096
 
@@ -22,31 +38,46 @@ defmodule AgentHarness.API do
         "model" => model,
         "max_tokens" => max_tokens,
         "messages" => messages,
-        "tools" => tools
+        "stream" => true
       }
-      |> maybe_put("system", system)
-
-    case Req.post(api_url,
-           json: body,
-           headers: [
-             {"x-api-key", api_key},
-             {"anthropic-version", @api_version},
-             {"content-type", "application/json"}
-           ],
-           receive_timeout: 120_000
-         ) do
-      {:ok, %Req.Response{status: 200, body: body}} ->
-        {:ok, body}
-
-      {:ok, %Req.Response{status: status, body: body}} ->
-        {:error, "API returned #{status}: #{inspect(body)}"}
+      |> maybe_put("tools", cache_last_tool(tools))
+      |> maybe_put("system", system_blocks(system))
+
+    req_options =
+      Keyword.merge(
+        [
+          json: body,
+          headers: [
+            {"x-api-key", api_key},
+            {"anthropic-version", @api_version},
+            {"content-type", "application/json"}
+          ],
+          receive_timeout: @stream_idle_timeout,
+          compressed: false,
+          finch: AgentHarness.Finch,
+          into: &collect_stream/2
+        ],
+        opts[:req_options] || []
+      )
+
+    case Req.post(api_url, req_options) do
+      {:ok, %Req.Response{status: 200} = resp} ->
+        resp |> Req.Response.get_private(:sse, SSE.new()) |> SSE.finish()
+
+      {:ok, %Req.Response{status: status} = resp} ->
+        {:error, "API returned #{status}: #{inspect(error_body(resp))}"}
 
       {:error, reason} ->
         {:error, "Request failed: #{inspect(reason)}"}
     end
   end
 
-  defp resolve_provider(opts) do
+  @doc """
+  Resolves `{api_key, api_url}` from `opts` or the environment, or returns nil
+  when no key is available. Agents call this once at startup and pass the
+  result back as `:api_key`/`:api_url` so per-call resolution is a no-op.
+  """
+  def provider(opts \\ []) do
     cond do
       key = opts[:api_key] ->
         url = opts[:api_url] || @anthropic_url
@@ -59,10 +90,54 @@ defmodule AgentHarness.API do
         {key, @anthropic_url}
 
       true ->
-        raise "No API key set. Export OPENROUTER_API_KEY or ANTHROPIC_API_KEY."
+        nil
+    end
+  end
+
+  # Successful responses are server-sent events and are accumulated as they
+  # arrive; error responses are plain JSON and are kept as raw bytes.
+  defp collect_stream({:data, data}, {req, %Req.Response{status: 200} = resp}) do
+    sse = resp |> Req.Response.get_private(:sse, SSE.new()) |> SSE.feed(data)
+    {:cont, {req, Req.Response.put_private(resp, :sse, sse)}}
+  end
+
+  defp collect_stream({:data, data}, {req, resp}) do
+    raw = Req.Response.get_private(resp, :raw_body, "")
+    {:cont, {req, Req.Response.put_private(resp, :raw_body, raw <> data)}}
+  end
+
+  defp error_body(resp) do
+    raw = Req.Response.get_private(resp, :raw_body, "")
+
+    case Jason.decode(raw) do
+      {:ok, decoded} -> decoded
+      {:error, _} -> raw
     end
   end
 
+  defp resolve_provider(opts) do
+    provider(opts) ||
+      raise "No API key set. Export OPENROUTER_API_KEY or ANTHROPIC_API_KEY."
+  end
+
+  # Prompt caching: the system prompt and tool definitions are identical on
+  # every turn of a conversation, so mark both as cache breakpoints. The API
+  # then reuses the cached prefix instead of re-processing it each turn.
+  defp system_blocks(nil), do: nil
+
+  defp system_blocks(system) do
+    [%{"type" => "text", "text" => system, "cache_control" => @cache_breakpoint}]
+  end
+
+  # No tools (e.g. the wrap-up call) means no "tools" key at all, rather than
+  # an empty list that would still be part of the cached prefix.
+  defp cache_last_tool([]), do: nil
+
+  defp cache_last_tool(tools) do
+    {last, rest} = List.pop_at(tools, -1)
+    rest ++ [Map.put(last, "cache_control", @cache_breakpoint)]
+  end
+
   defp maybe_put(map, _key, nil), do: map
   defp maybe_put(map, key, value), do: Map.put(map, key, value)
 end
@@ -9,6 +9,10 @@ defmodule AgentHarness.Application do
     children = [
       {Registry, keys: :unique, name: AgentHarness.AgentRegistry},
       {DynamicSupervisor, name: AgentHarness.AgentSupervisor, strategy: :one_for_one},
+      {Task.Supervisor, name: AgentHarness.TaskSupervisor},
+      # Dedicated HTTP pool for model API calls, so every agent and drone shares
+      # warm keep-alive connections instead of queueing on Req's default pool.
+      {Finch, name: AgentHarness.Finch, pools: %{default: [size: 100]}},
       AgentHarness.ToolRegistry,
       {Phoenix.PubSub, name: AgentHarness.PubSub},
       AgentHarnessWeb.Endpoint
@@ -2,11 +2,19 @@ defmodule AgentHarness.ScriptRunner do
   @moduledoc """
   Runs a script file with JSON input passed via the TOOL_INPUT environment variable.
   Shared by ToolRegistry (built-in dynamic tools) and ToolSet (per-agent dynamic tools).
+  `open_port/3` and `collect_output/3` are also used by the run_command tool.
   """
 
   @default_timeout_ms 120_000
   @default_max_output_bytes 200_000
 
+  # Extra time the caller waits for a task to kill a timed-out child and
+  # report back before falling back to killing the task itself.
+  @kill_grace_ms 1_000
+
+  @doc "Extra time callers should wait past a timeout for the kill to be reported."
+  def kill_grace_ms, do: @kill_grace_ms
+
   @doc """
   Runs a script at `script_path` with `input` map. Returns `{:ok, output}` or `{:error, reason}`.
 
@@ -20,39 +28,116 @@ defmodule AgentHarness.ScriptRunner do
     json_input = Jason.encode!(input) |> String.replace(<<0>>, "")
 
     task =
-      Task.async(fn ->
+      Task.Supervisor.async(AgentHarness.TaskSupervisor, fn ->
         port =
-          Port.open({:spawn_executable, script_path}, [
+          open_port(script_path, [], [
             :binary,
             :exit_status,
             :stderr_to_stdout,
             env: [{~c"TOOL_INPUT", String.to_charlist(json_input)}]
           ])
 
-        collect_port_output(port, "", timeout)
+        case collect_output(port, max_bytes, timeout) do
+          {:exit_status, 0, output} -> {:ok, output}
+          {:exit_status, code, output} -> {:error, "Script exited with code #{code}: #{output}"}
+          :timeout -> :timeout
+        end
       end)
 
-    case Task.yield(task, timeout) || Task.shutdown(task, :brutal_kill) do
+    case Task.yield(task, timeout + @kill_grace_ms) || Task.shutdown(task, :brutal_kill) do
       {:ok, {:ok, output}} -> {:ok, truncate(output, max_bytes)}
       {:ok, {:error, reason}} -> {:error, reason}
-      nil -> {:error, "Tool script timed out after #{div(timeout, 1000)} seconds"}
+      _ -> {:error, "Tool script timed out after #{div(timeout, 1000)} seconds"}
     end
   rescue
     e -> {:error, "Tool script failed: #{Exception.message(e)}"}
   end
 
-  defp collect_port_output(port, acc, timeout) do
+  @doc """
+  Opens a port running `executable` with `args` as the leader of its own
+  process group, so a timeout in `collect_output/3` can kill the whole group,
+  including pipelines and anything the program forked.
+
+  The group is created with `setsid --wait`, which keeps the program's exit
+  status. Port programs share the VM's process group, so setsid does not fork
+  and the group id is the port's OS pid. Where `setsid` is not available the
+  program is run directly and only it is killed on timeout.
+  """
+  def open_port(executable, args, opts) do
+    case setsid() do
+      nil ->
+        Port.open({:spawn_executable, executable}, [{:args, args} | opts])
+
+      setsid ->
+        Port.open({:spawn_executable, setsid}, [{:args, ["--wait", executable | args]} | opts])
+    end
+  end
+
+  # Looked up on first use and kept in :persistent_term, so running a command
+  # does not scan PATH for setsid every time.
+  defp setsid do
+    case :persistent_term.get({__MODULE__, :setsid}, :unresolved) do
+      :unresolved ->
+        setsid = System.find_executable("setsid")
+        :persistent_term.put({__MODULE__, :setsid}, setsid)
+        setsid
+
+      setsid ->
+        setsid
+    end
+  end
+
+  @doc """
+  Collects output from `port` (opened with `:binary` and `:exit_status`) until
+  it exits. Returns `{:exit_status, code, output}`, or `:timeout` if it has not
+  exited within `timeout` ms, in which case the OS process is killed and the
+  port closed.
+
+  Output is accumulated as iodata and only flattened once. Anything past
+  `max_bytes` is drained but dropped, since it would be truncated anyway.
+  """
+  def collect_output(port, max_bytes, timeout) do
+    deadline = System.monotonic_time(:millisecond) + timeout
+    collect_output(port, [], 0, max_bytes, deadline)
+  end
+
+  defp collect_output(port, acc, size, max_bytes, deadline) do
     receive do
-      {^port, {:data, data}} -> collect_port_output(port, acc <> data, timeout)
-      {^port, {:exit_status, 0}} -> {:ok, acc}
-      {^port, {:exit_status, code}} -> {:error, "Script exited with code #{code}: #{acc}"}
+      {^port, {:data, _data}} when size > max_bytes ->
+        collect_output(port, acc, size, max_bytes, deadline)
+
+      {^port, {:data, data}} ->
+        collect_output(port, [acc | data], size + byte_size(data), max_bytes, deadline)
+
+      {^port, {:exit_status, code}} ->
+        {:exit_status, code, IO.iodata_to_binary(acc)}
     after
-      timeout ->
-        Port.close(port)
-        {:error, "Timed out reading script output"}
+      max(deadline - System.monotonic_time(:millisecond), 0) ->
+        kill(port)
+        :timeout
     end
   end
 
+  # Closing a port does not stop the program behind it, so a timed-out command
+  # would keep running. Kill its process group first. This uses the shell's
+  # kill builtin, since a kill executable is not installed everywhere.
+  defp kill(port) do
+    case Port.info(port, :os_pid) do
+      {:os_pid, os_pid} ->
+        # The group (see open_port/3) and the pid itself, for when no group was
+        # created; kill reports the missing one, which is fine to ignore.
+        System.cmd("sh", ["-c", "kill -KILL -#{os_pid} #{os_pid}"], stderr_to_stdout: true)
+
+      nil ->
+        :ok
+    end
+
+    Port.close(port)
+  rescue
+    # The port may already have closed once the killed process exited.
+    ArgumentError -> :ok
+  end
+
   @doc "Truncates output to `max_bytes`, appending a notice if truncated."
   def truncate(output, max_bytes) when byte_size(output) > max_bytes do
     binary_part(output, 0, max_bytes) <> "\n... (output truncated)"
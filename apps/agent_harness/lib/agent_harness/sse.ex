@@ -0,0 +1,153 @@
+defmodule AgentHarness.SSE do
+  @moduledoc """
+  Accumulates a streamed Messages API response (server-sent events) into the
+  same message map a non-streaming request returns.
+
+  `AgentHarness.API` feeds raw chunks in as they arrive with `feed/2` and calls
+  `finish/1` once the connection closes. Deltas are kept as iodata per content
+  block and flattened once at the end, so long generations are not re-copied
+  on every token.
+  """
+
+  defstruct buffer: "", message: nil, blocks: %{}, deltas: %{}, done: false, error: nil
+
+  @doc "Returns an empty accumulator."
+  def new, do: %__MODULE__{}
+
+  @doc "Feeds a raw chunk of the event stream into the accumulator."
+  def feed(%__MODULE__{} = acc, data) do
+    parts =
+      (acc.buffer <> data)
+      |> String.replace("\r\n", "\n")
+      |> String.split("\n\n")
+
+    {frames, [rest]} = Enum.split(parts, -1)
+    Enum.reduce(frames, %{acc | buffer: rest}, &apply_frame/2)
+  end
+
+  @doc """
+  Returns `{:ok, message}` for a completed stream, or `{:error, reason}` if the
+  stream reported an error or ended before `message_stop`.
+  """
+  def finish(%__MODULE__{error: error}) when error != nil, do: {:error, error}
+
+  def finish(%__MODULE__{done: false}) do
+    {:error, "API stream ended before message_stop"}
+  end
+
+  def finish(%__MODULE__{message: message, blocks: blocks, deltas: deltas}) do
+    blocks =
+      Enum.reduce(deltas, blocks, fn {{index, field}, iodata}, acc ->
+        Map.update(acc, index, %{field => iodata}, &Map.put(&1, field, iodata))
+      end)
+
+    content =
+      blocks
+      |> Enum.sort_by(fn {index, _block} -> index end)
+      |> Enum.map(fn {_index, block} -> finalize_block(block) end)
+
+    case Enum.find(content, &match?({:error, _}, &1)) do
+      nil -> {:ok, Map.put(message, "content", content)}
+      error -> error
+    end
+  end
+
+  defp apply_frame(frame, acc) do
+    payload =
+      frame
+      |> String.split("\n")
+      |> Enum.flat_map(fn
+        "data:" <> data -> [String.trim_leading(data)]
+        _line -> []
+      end)
+      |> Enum.join("\n")
+
+    case payload do
+      "" ->
+        acc
+
+      _ ->
+        case Jason.decode(payload) do
+          {:ok, event} -> apply_event(event, acc)
+          {:error, _} -> %{acc | error: "Malformed API stream event: #{payload}"}
+        end
+    end
+  end
+
+  defp apply_event(%{"type" => "message_start", "message" => message}, acc) do
+    %{acc | message: message}
+  end
+
+  defp apply_event(%{"type" => "content_block_start", "index" => index} = event, acc) do
+    %{acc | blocks: Map.put(acc.blocks, index, event["content_block"])}
+  end
+
+  defp apply_event(%{"type" => "content_block_delta", "index" => index, "delta" => delta}, acc) do
+    case delta_field(delta) do
+      {field, chunk} ->
+        deltas = Map.update(acc.deltas, {index, field}, [chunk], &[&1 | chunk])
+        %{acc | deltas: deltas}
+
+      nil ->
+        acc
+    end
+  end
+
+  defp apply_event(%{"type" => "message_delta"} = event, %{message: message} = acc)
+       when is_map(message) do
+    message = Map.merge(message, event["delta"] || %{})
+
+    message =
+      case event["usage"] do
+        nil -> message
+        usage -> Map.update(message, "usage", usage, &Map.merge(&1, usage))
+      end
+
+    %{acc | message: message}
+  end
+
+  defp apply_event(%{"type" => "message_stop"}, %{message: message} = acc)
+       when is_map(message) do
+    %{acc | done: true}
+  end
+
+  defp apply_event(%{"type" => "error", "error" => error}, acc) do
+    %{acc | error: "API stream error: #{inspect(error)}"}
+  end
+
+  defp apply_event(_event, acc), do: acc
+
+  defp delta_field(%{"type" => "text_delta", "text" => text}), do: {"text", text}
+  defp delta_field(%{"type" => "input_json_delta", "partial_json" => json}), do: {"input", json}
+  defp delta_field(%{"type" => "thinking_delta", "thinking" => text}), do: {"thinking", text}
+  defp delta_field(%{"type" => "signature_delta", "signature" => sig}), do: {"signature", sig}
+  defp delta_field(_delta), do: nil
+
+  # Tool input is streamed as JSON fragments and only parsed once, here.
+  defp finalize_block(%{"type" => "tool_use", "input" => input} = block) when is_map(input) do
+    block
+  end
+
+  defp finalize_block(%{"type" => "tool_use"} = block) do
+    case IO.iodata_to_binary(block["input"] || "") do
+      "" ->
+        Map.put(block, "input", %{})
+
+      json ->
+        case Jason.decode(json) do
+          {:ok, input} -> Map.put(block, "input", input)
+          {:error, _} -> {:error, "Invalid tool input JSON for #{block["name"]}: #{json}"}
+        end
+    end
+  end
+
+  defp finalize_block(block) do
+    Map.new(block, fn
+      {key, value} when key in ["text", "thinking", "signature"] ->
+        {key, IO.iodata_to_binary(value)}
+
+      pair ->
+        pair
+    end)
+  end
+end
@@ -3,9 +3,11 @@ defmodule AgentHarness.ToolRegistry do
   Registry of available tools. Built-in tools are seeded on init;
   dynamic tools can be registered at runtime via `register/4`.
 
-  Built-in tools are stored as `{name, {:module, module}}`.
-  Dynamic tools are stored as `{name, {:script, definition}}` where
-  definition holds the description, input_schema, and script path.
+  Built-in tools are stored as `{name, {:module, module}, api_definition}`.
+  Dynamic tools are stored as `{name, {:script, definition}, api_definition}`
+  where definition holds the description, input_schema, and script path.
+  The API definition is built once at insert time so listing tools each
+  turn is a plain ETS select.
   """
   use GenServer
 
@@ -42,6 +44,7 @@ defmodule AgentHarness.ToolRegistry do
     CollectDroneResults,
     CancelDrones
   ]
+  @builtin_names Enum.map(@builtin_modules, & &1.name())
 
   # --- Public API ---
 
@@ -51,14 +54,13 @@ defmodule AgentHarness.ToolRegistry do
 
   @doc "Returns API definitions for all registered tools (built-in + dynamic)."
   def all_definitions do
-    :ets.tab2list(@table)
-    |> Enum.map(fn {_name, entry} -> to_definition(entry) end)
+    :ets.select(@table, [{{:_, :_, :"$1"}, [], [:"$1"]}])
   end
 
   @doc "Executes a tool by name."
   def execute(name, input) do
     case :ets.lookup(@table, name) do
-      [{^name, entry}] -> do_execute(entry, input)
+      [{^name, entry, _definition}] -> do_execute(entry, input)
       [] -> {:error, "Unknown tool: #{name}"}
     end
   end
@@ -75,18 +77,15 @@ defmodule AgentHarness.ToolRegistry do
 
   @doc "Returns list of all registered tool names."
   def tool_names do
-    :ets.tab2list(@table) |> Enum.map(fn {name, _} -> name end)
+    :ets.select(@table, [{{:"$1", :_, :_}, [], [:"$1"]}])
   end
 
   @doc "Returns the list of built-in tool names."
-  def builtin_names do
-    Enum.map(@builtin_modules, & &1.name())
-  end
+  def builtin_names, do: @builtin_names
 
   @doc "Returns count of dynamic (non-built-in) tools."
   def dynamic_tool_count do
-    :ets.tab2list(@table)
-    |> Enum.count(fn {_name, entry} -> match?({:script, _}, entry) end)
+    :ets.select_count(@table, [{{:_, {:script, :_}, :_}, [], [true]}])
   end
 
   # --- GenServer Callbacks ---
@@ -96,7 +95,8 @@ defmodule AgentHarness.ToolRegistry do
     table = :ets.new(@table, [:named_table, :set, :public, read_concurrency: true])
 
     for module <- @builtin_modules do
-      :ets.insert(table, {module.name(), {:module, module}})
+      entry = {:module, module}
+      :ets.insert(table, {module.name(), entry, to_definition(entry)})
     end
 
     {:ok, %{table: table}}
@@ -126,7 +126,7 @@ defmodule AgentHarness.ToolRegistry do
              script_path: script_path
            }}
 
-        :ets.insert(state.table, {name, entry})
+        :ets.insert(state.table, {name, entry, to_definition(entry)})
         {:reply, {:ok, name}, state}
     end
   end
@@ -136,7 +136,7 @@ defmodule AgentHarness.ToolRegistry do
       {:reply, {:error, "Cannot remove built-in tool: #{name}"}, state}
     else
       case :ets.lookup(state.table, name) do
-        [{^name, {:script, %{script_path: path}}}] ->
+        [{^name, {:script, %{script_path: path}}, _definition}] ->
           File.rm(path)
           :ets.delete(state.table, name)
           {:reply, :ok, state}
@@ -16,19 +16,12 @@ defmodule AgentHarness.ToolSet do
 
   @doc "Returns all tool definitions: built-in (from ToolRegistry) + agent's dynamic tools."
   def all_definitions(table) do
-    builtin = ToolRegistry.all_definitions()
-
-    dynamic =
-      :ets.tab2list(table)
-      |> Enum.map(fn {_name, def_map} ->
-        %{
-          "name" => def_map.name,
-          "description" => def_map.description,
-          "input_schema" => def_map.input_schema
-        }
-      end)
+    ToolRegistry.all_definitions() ++ dynamic_definitions(table)
+  end
 
-    builtin ++ dynamic
+  @doc "Returns definitions for this agent's dynamic tools only."
+  def dynamic_definitions(table) do
+    :ets.select(table, [{{:_, %{definition: :"$1"}}, [], [:"$1"]}])
   end
 
   @doc "Registers a dynamic tool in this agent's table."
@@ -50,7 +43,12 @@ defmodule AgentHarness.ToolSet do
           name: name,
           description: description,
           input_schema: input_schema,
-          script_path: script_path
+          script_path: script_path,
+          definition: %{
+            "name" => name,
+            "description" => description,
+            "input_schema" => input_schema
+          }
         }
 
         :ets.insert(table, {name, entry})
@@ -1,6 +1,8 @@
 defmodule AgentHarness.Tools.EditFile do
   @behaviour AgentHarness.Tool
 
+  alias AgentHarness.Tools.WriteFile
+
   @impl true
   def name, do: "edit_file"
 
@@ -40,18 +42,28 @@ defmodule AgentHarness.Tools.EditFile do
       old == "" ->
         # Create new file
         File.mkdir_p!(Path.dirname(path))
-        File.write!(path, new)
+        WriteFile.atomic_write!(path, new)
         {:ok, "Created #{path}"}
 
       true ->
         case File.read(path) do
           {:ok, content} ->
-            if String.contains?(content, old) do
-              updated = String.replace(content, old, new, global: false)
-              File.write!(path, updated)
-              {:ok, "Updated #{path}"}
-            else
-              {:error, "old_string not found in #{path}"}
+            # One scan finds the match; the edit is written as iodata slices
+            # of the original binary instead of building a new copy.
+            case :binary.match(content, old) do
+              {start, len} ->
+                rest = byte_size(content) - start - len
+
+                WriteFile.atomic_write!(path, [
+                  binary_part(content, 0, start),
+                  new,
+                  binary_part(content, start + len, rest)
+                ])
+
+                {:ok, "Updated #{path}"}
+
+              :nomatch ->
+                {:error, "old_string not found in #{path}"}
             end
 
           {:error, :enoent} ->
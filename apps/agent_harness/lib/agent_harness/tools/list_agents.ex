@@ -45,6 +45,6 @@ defmodule AgentHarness.Tools.ListAgents do
         }
       end)
 
-    {:ok, Jason.encode!(agents, pretty: true)}
+    {:ok, Jason.encode!(agents)}
   end
 end
@@ -1,11 +1,16 @@
 defmodule AgentHarness.Tools.ReadFile do
   @behaviour AgentHarness.Tool
 
+  @max_bytes 200_000
+
   @impl true
   def name, do: "read_file"
 
   @impl true
-  def description, do: "Read the contents of a file at the given path."
+  def description do
+    "Read the contents of a file at the given path. At most 200KB are returned per call; " <>
+      "use offset to continue reading a larger file."
+  end
 
   @impl true
   def input_schema do
@@ -15,6 +20,10 @@ defmodule AgentHarness.Tools.ReadFile do
         "path" => %{
           "type" => "string",
           "description" => "The path to the file to read"
+        },
+        "offset" => %{
+          "type" => "integer",
+          "description" => "Optional byte offset to start reading from (default 0)"
         }
       },
       "required" => ["path"]
@@ -22,11 +31,48 @@ defmodule AgentHarness.Tools.ReadFile do
   end
 
   @impl true
-  def execute(%{"path" => path}) do
-    case File.read(path) do
-      {:ok, content} -> {:ok, content}
+  def execute(%{"path" => path} = input) do
+    offset = input["offset"] || 0
+
+    result =
+      if is_integer(offset) and offset >= 0 do
+        case File.open(path, [:read, :binary], &read_window(&1, offset)) do
+          {:ok, result} -> result
+          {:error, reason} -> {:error, reason}
+        end
+      else
+        {:error, :bad_offset}
+      end
+
+    case result do
+      {:ok, output} -> {:ok, output}
+      {:error, :bad_offset} -> {:error, "offset must be a non-negative integer"}
       {:error, :enoent} -> {:error, "File not found: #{path}"}
       {:error, reason} -> {:error, "Failed to read #{path}: #{reason}"}
     end
   end
+
+  # One open and one positioned read of a byte past the cap, so truncation is
+  # detected without reading the rest of the file. The file size is only looked
+  # up (from the open handle) when the output is actually truncated.
+  defp read_window(io, offset) do
+    case :file.pread(io, offset, @max_bytes + 1) do
+      {:ok, data} when byte_size(data) > @max_bytes ->
+        {:ok, size} = :file.position(io, :eof)
+        next = offset + @max_bytes
+
+        {:ok,
+         binary_part(data, 0, @max_bytes) <>
+           "\n... (truncated at byte #{next} of #{size}; continue with offset #{next})"}
+
+      {:ok, data} ->
+        {:ok, data}
+
+      :eof ->
+        {:ok, ""}
+
+      {:error, reason} ->
+        {:error, reason}
+    end
+  end
 end
@@ -1,6 +1,8 @@
 defmodule AgentHarness.Tools.RunCommand do
   @behaviour AgentHarness.Tool
 
+  alias AgentHarness.ScriptRunner
+
   @impl true
   def name, do: "run_command"
 
@@ -44,25 +46,34 @@ defmodule AgentHarness.Tools.RunCommand do
   def execute(%{"command" => command} = input) do
     timeout = resolve_timeout(input)
     max_bytes = resolve_max_output_bytes(input)
-    opts = [stderr_to_stdout: true]
+    opts = [:binary, :exit_status, :stderr_to_stdout]
 
     opts =
       case Map.get(input, "working_directory") do
         nil -> opts
         "" -> opts
-        dir -> Keyword.put(opts, :cd, dir)
+        dir -> [{:cd, dir} | opts]
       end
 
-    task = Task.async(fn -> System.cmd("sh", ["-c", command], opts) end)
+    # A port instead of System.cmd, so output past max_bytes is dropped as it
+    # arrives rather than buffered in full and truncated afterwards.
+    task =
+      Task.Supervisor.async(AgentHarness.TaskSupervisor, fn ->
+        port = ScriptRunner.open_port(System.find_executable("sh"), ["-c", command], opts)
+        ScriptRunner.collect_output(port, max_bytes, timeout)
+      end)
 
-    case Task.yield(task, timeout) || Task.shutdown(task, :brutal_kill) do
-      {:ok, {output, 0}} ->
-        {:ok, AgentHarness.ScriptRunner.truncate(output, max_bytes)}
+    # collect_output/3 kills the command at the deadline; the grace period lets
+    # the task report that before it is killed itself.
+    case Task.yield(task, timeout + ScriptRunner.kill_grace_ms()) ||
+           Task.shutdown(task, :brutal_kill) do
+      {:ok, {:exit_status, 0, output}} ->
+        {:ok, ScriptRunner.truncate(output, max_bytes)}
 
-      {:ok, {output, code}} ->
-        {:ok, AgentHarness.ScriptRunner.truncate("Exit code #{code}:\n#{output}", max_bytes)}
+      {:ok, {:exit_status, code, output}} ->
+        {:ok, ScriptRunner.truncate("Exit code #{code}:\n#{output}", max_bytes)}
 
-      nil ->
+      _ ->
         {:error, "Command timed out after #{div(timeout, 1000)} seconds"}
     end
   rescue
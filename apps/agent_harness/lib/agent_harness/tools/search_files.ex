@@ -67,14 +67,21 @@ defmodule AgentHarness.Tools.SearchFiles do
 
   defp search_directory(dir, pattern, file_pattern) do
     compiled_file_regex = compile_file_pattern(file_pattern)
+    matcher = compile_matcher(pattern)
 
-    dir
-    |> list_files_recursive()
-    |> Enum.filter(&matches_file_pattern?(&1, compiled_file_regex))
-    |> Enum.flat_map(&search_file(&1, pattern))
+    files = list_files_recursive(dir, compiled_file_regex)
+
+    AgentHarness.TaskSupervisor
+    |> Task.Supervisor.async_stream(files, &search_file(&1, matcher),
+      max_concurrency: System.schedulers_online(),
+      timeout: :infinity
+    )
+    |> Enum.flat_map(fn {:ok, matches} -> matches end)
   end
 
-  defp list_files_recursive(dir) do
+  # The file pattern is applied during the walk, so non-matching files are
+  # never collected into the intermediate list.
+  defp list_files_recursive(dir, file_regex) do
     case File.ls(dir) do
       {:ok, entries} ->
         Enum.flat_map(entries, fn entry ->
@@ -84,9 +91,14 @@ defmodule AgentHarness.Tools.SearchFiles do
             []
           else
             case File.lstat(full_path) do
-              {:ok, %{type: :directory}} -> list_files_recursive(full_path)
-              {:ok, %{type: :regular}} -> [full_path]
-              _ -> []
+              {:ok, %{type: :directory}} ->
+                list_files_recursive(full_path, file_regex)
+
+              {:ok, %{type: :regular}} ->
+                if matches_file_pattern?(entry, file_regex), do: [full_path], else: []
+
+              _ ->
+                []
             end
           end
         end)
@@ -114,43 +126,101 @@ defmodule AgentHarness.Tools.SearchFiles do
 
   defp matches_file_pattern?(_path, nil), do: true
 
-  defp matches_file_pattern?(path, regex) do
-    Regex.match?(regex, Path.basename(path))
+  defp matches_file_pattern?(basename, regex) do
+    Regex.match?(regex, basename)
   end
 
-  defp search_file(path, pattern) do
+  defp search_file(path, matcher) do
     case File.stat(path) do
       {:ok, %{size: size}} when size > @max_file_size ->
         []
 
       _ ->
-        case File.read(path) do
+        case read_text(path) do
           {:ok, content} ->
             if String.valid?(content) do
-              search_content(content, path, pattern)
+              search_content(content, path, matcher)
             else
               []
             end
 
-          {:error, _} ->
+          _ ->
             []
         end
     end
   end
 
-  defp search_content(content, path, pattern) do
-    lines =
+  # Peeks at the first 8KB and gives up on a NUL byte (the usual binary-file
+  # heuristic), so binaries are skipped without reading or validating the rest.
+  defp read_text(path) do
+    case File.open(path, [:read, :binary], &read_unless_binary/1) do
+      {:ok, content} when is_binary(content) -> {:ok, content}
+      _ -> :skip
+    end
+  end
+
+  defp read_unless_binary(io) do
+    case IO.binread(io, 8192) do
+      :eof ->
+        ""
+
+      head when is_binary(head) ->
+        if :binary.match(head, <<0>>) == :nomatch do
+          case IO.binread(io, :eof) do
+            :eof -> head
+            rest when is_binary(rest) -> head <> rest
+            error -> error
+          end
+        else
+          :binary
+        end
+
+      error ->
+        error
+    end
+  end
+
+  defp search_content(content, path, matcher) do
+    if may_match?(content, matcher) do
       content
       |> String.split("\n")
       |> Enum.with_index(1)
+      |> Enum.filter(fn {line, _num} -> line_matches?(line, matcher) end)
+      |> Enum.map(fn {line, num} -> "#{path}:#{num}: #{line}" end)
+    else
+      []
+    end
+  end
 
+  # The search pattern is compiled once per call and shared by every file scan.
+  # Invalid regexes fall back to a literal search.
+  defp compile_matcher(pattern) do
     case Regex.compile(pattern) do
-      {:ok, regex} ->
-        Enum.filter(lines, fn {line, _num} -> Regex.match?(regex, line) end)
+      {:ok, line_regex} -> {:regex, line_regex, compile_prefilter(pattern)}
+      {:error, _} -> {:literal, :binary.compile_pattern(pattern)}
+    end
+  end
 
-      {:error, _} ->
-        Enum.filter(lines, fn {line, _num} -> String.contains?(line, pattern) end)
+  # One match over the whole buffer rules out most files before they are split
+  # into lines. With the multiline flag ^ and $ stay line-anchored; patterns that
+  # depend on string boundaries or negative lookaround can match a line without
+  # matching the whole buffer, so they skip the prefilter.
+  defp compile_prefilter(pattern) do
+    if Regex.match?(~r/\\[AzZG]|\(\?<?!|\(\?[a-z]*-/, pattern) do
+      nil
+    else
+      case Regex.compile(pattern, "m") do
+        {:ok, regex} -> regex
+        {:error, _} -> nil
+      end
     end
-    |> Enum.map(fn {line, num} -> "#{path}:#{num}: #{line}" end)
   end
+
+  defp may_match?(_content, {:regex, _line_regex, nil}), do: true
+  defp may_match?(content, {:regex, _line_regex, buffer_regex}),
+    do: Regex.match?(buffer_regex, content)
+  defp may_match?(content, {:literal, literal}), do: String.contains?(content, literal)
+
+  defp line_matches?(line, {:regex, regex, _buffer_regex}), do: Regex.match?(regex, line)
+  defp line_matches?(line, {:literal, literal}), do: String.contains?(line, literal)
 end
@@ -31,9 +31,78 @@ defmodule AgentHarness.Tools.WriteFile do
   @impl true
   def execute(%{"path" => path, "content" => content}) do
     File.mkdir_p!(Path.dirname(path))
-    File.write!(path, content)
+    atomic_write!(path, content)
     {:ok, "Wrote #{path}"}
   rescue
     e -> {:error, "Failed to write #{path}: #{Exception.message(e)}"}
   end
+
+  @doc """
+  Writes `content` to `path` through a temporary file in the same directory,
+  synced to disk and then renamed over the target, so neither a crash nor a
+  power loss mid-write leaves a partially written file.
+
+  An existing file keeps its permissions and owner. Symlinks and hard-linked
+  files are written through in place, so their other names still see the new
+  content. The write also happens in place when the temporary file cannot be
+  created (a writable file in a read-only directory) or the owner cannot be
+  kept. Shared with edit_file.
+  """
+  def atomic_write!(path, content) do
+    case File.lstat(path) do
+      {:ok, %{type: :symlink}} -> File.write!(path, content)
+      {:ok, %{links: links}} when links > 1 -> File.write!(path, content)
+      {:ok, stat} -> replace!(path, content, stat)
+      {:error, _} -> replace!(path, content, nil)
+    end
+  end
+
+  defp replace!(path, content, stat) do
+    tmp =
+      Path.join(
+        Path.dirname(path),
+        ".#{Path.basename(path)}.tmp.#{System.unique_integer([:positive])}"
+      )
+
+    case File.open(tmp, [:write, :binary, :exclusive]) do
+      {:ok, io} ->
+        try do
+          write_synced!(io, content)
+
+          case keep_attributes(tmp, stat) do
+            :ok ->
+              File.rename!(tmp, path)
+
+            {:error, _reason} ->
+              File.rm!(tmp)
+              File.write!(path, content)
+          end
+        rescue
+          e ->
+            File.rm(tmp)
+            reraise e, __STACKTRACE__
+        end
+
+      {:error, _reason} ->
+        File.write!(path, content)
+    end
+  end
+
+  # The data must reach the disk before the rename, or after a power loss the
+  # rename can be durable while the data is not, leaving an empty target.
+  defp write_synced!(io, content) do
+    :ok = IO.binwrite(io, content)
+    :ok = :file.sync(io)
+    :ok = File.close(io)
+  end
+
+  # Owner first: changing it can clear the setuid and setgid bits.
+  defp keep_attributes(_tmp, nil), do: :ok
+
+  defp keep_attributes(tmp, %{mode: mode, uid: uid, gid: gid}) do
+    with :ok <- File.chown(tmp, uid),
+         :ok <- File.chgrp(tmp, gid) do
+      File.chmod(tmp, Bitwise.band(mode, 0o7777))
+    end
+  end
 end
@@ -184,22 +184,39 @@ defmodule AgentHarnessWeb.ReplLive do
     assign(socket, messages: [%{role: role, content: content} | socket.assigns.messages])
   end
 
-  # Attach a tool result to the most recent tool_use with matching name.
-  # Messages are newest-first, so we scan forward to find the first match.
+  # Attach a tool result to the oldest unmatched tool_use with that name among
+  # the tool_uses at the head of the (newest-first) list, i.e. the current batch.
+  # Concurrent tool calls emit all their tool_use events before any results, and
+  # results arrive in call order. The scan stops at the first other message, so
+  # a stale unmatched tool_use from an earlier turn never takes a result.
   defp attach_tool_result(socket, name, result_content) do
-    messages = attach_result_forward(socket.assigns.messages, name, result_content)
-    assign(socket, messages: messages)
-  end
+    messages = socket.assigns.messages
 
-  defp attach_result_forward([], _name, _result), do: []
+    case oldest_unmatched_index(messages, name) do
+      nil ->
+        socket
 
-  defp attach_result_forward([%{role: :tool_use, content: %{name: n} = content} = msg | rest], name, result)
-       when n == name and not is_map_key(content, :result) do
-    [%{msg | content: Map.put(content, :result, result)} | rest]
+      index ->
+        messages =
+          List.update_at(messages, index, fn %{content: content} = msg ->
+            %{msg | content: Map.put(content, :result, result_content)}
+          end)
+
+        assign(socket, messages: messages)
+    end
   end
 
-  defp attach_result_forward([h | t], name, result) do
-    [h | attach_result_forward(t, name, result)]
+  defp oldest_unmatched_index(messages, name) do
+    messages
+    |> Enum.take_while(&(&1.role == :tool_use))
+    |> Enum.with_index()
+    |> Enum.reduce(nil, fn
+      {%{content: %{name: ^name} = content}, index}, _acc when not is_map_key(content, :result) ->
+        index
+
+      _message, acc ->
+        acc
+    end)
   end
 
   defp update_drone(socket, drone_id, fun) do
@@ -6,7 +6,7 @@ defmodule Mix.Tasks.TestAgent do
 
   @impl true
   def run(args) do
-    load_dotenv()
+    # app.start loads .env via AgentHarness.Application
     Mix.Task.run("app.start")
 
     message = Enum.join(args, " ")
@@ -55,22 +55,4 @@ defmodule Mix.Tasks.TestAgent do
         IO.puts("[timeout] No response after 120s")
     end
   end
-
-  defp load_dotenv do
-    case File.read(".env") do
-      {:ok, content} ->
-        content
-        |> String.split("\n", trim: true)
-        |> Enum.reject(&(String.starts_with?(&1, "#") or &1 == ""))
-        |> Enum.each(fn line ->
-          case String.split(line, "=", parts: 2) do
-            [key, value] -> System.put_env(String.trim(key), String.trim(value))
-            _ -> :ok
-          end
-        end)
-
-      _ ->
-        :ok
-    end
-  end
 end
@@ -22,6 +22,7 @@ defmodule AgentHarness.MixProject do
   defp deps do
     [
       {:req, "~> 0.5"},
+      {:finch, "~> 0.21"},
       {:jason, "~> 1.4"},
       {:phoenix, "~> 1.7"},
       {:phoenix_live_view, "~> 1.0"},
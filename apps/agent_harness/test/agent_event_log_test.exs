@@ -0,0 +1,54 @@
+defmodule AgentHarness.AgentEventLogTest do
+  use ExUnit.Case, async: false
+
+  alias AgentHarness.Agent
+
+  # 600 tool calls emit 1200 events (tool_use + tool_result each), then a
+  # final text and :done, so the log is trimmed at least once.
+  defmodule ManyToolCallsAPI do
+    def chat(messages, _tools, _opts) do
+      case List.last(messages) do
+        %{"role" => "user", "content" => [%{"type" => "tool_result"} | _]} ->
+          {:ok, %{"content" => [%{"type" => "text", "text" => "finished"}]}}
+
+        _ ->
+          content =
+            for n <- 1..600 do
+              %{
+                "type" => "tool_use",
+                "id" => "call-#{n}",
+                "name" => "no_such_tool",
+                "input" => %{"n" => n}
+              }
+            end
+
+          {:ok, %{"content" => content}}
+      end
+    end
+  end
+
+  test "get_events returns the newest 500 events, newest first" do
+    {:ok, pid} = Agent.start_supervised(api_module: ManyToolCallsAPI)
+
+    assert {:ok, "finished"} = Agent.chat(pid, "make many calls")
+
+    events = Agent.get_events(pid)
+    assert length(events) == 500
+    assert [:done, {:text, "finished"} | calls] = events
+
+    # The remaining 498 events are the last 249 calls, each result before its use.
+    pairs = Enum.chunk_every(calls, 2)
+    assert length(pairs) == 249
+
+    pairs
+    |> Enum.zip(600..352//-1)
+    |> Enum.each(fn {pair, n} ->
+      assert [
+               {:tool_result, "no_such_tool", "[error] " <> _},
+               {:tool_use, "no_such_tool", %{"n" => ^n}}
+             ] = pair
+    end)
+
+    DynamicSupervisor.terminate_child(AgentHarness.AgentSupervisor, pid)
+  end
+end
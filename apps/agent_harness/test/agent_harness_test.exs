@@ -37,6 +37,23 @@ defmodule AgentHarness.BuiltinToolsTest do
     assert {:error, _} = ToolRegistry.execute("read_file", %{"path" => "/tmp/nonexistent_xyz"})
   end
 
+  test "execute read_file caps output and continues from an offset" do
+    path = Path.join(System.tmp_dir!(), "harness_test_read_large.txt")
+    File.write!(path, String.duplicate("a", 200_000) <> "tail")
+
+    assert {:ok, head} = ToolRegistry.execute("read_file", %{"path" => path})
+
+    assert String.ends_with?(
+             head,
+             "\n... (truncated at byte 200000 of 200004; continue with offset 200000)"
+           )
+
+    assert {:ok, "tail"} =
+             ToolRegistry.execute("read_file", %{"path" => path, "offset" => 200_000})
+
+    File.rm!(path)
+  end
+
   test "execute list_files lists directory contents" do
     dir = Path.join(System.tmp_dir!(), "harness_test_list")
     File.mkdir_p!(dir)
@@ -81,6 +98,51 @@ defmodule AgentHarness.BuiltinToolsTest do
     File.rm!(path)
   end
 
+  test "execute write_file keeps file permissions and leaves no temp files" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_atomic")
+    File.mkdir_p!(dir)
+    path = Path.join(dir, "script.sh")
+    File.write!(path, "old")
+    File.chmod!(path, 0o755)
+
+    assert {:ok, _} = ToolRegistry.execute("write_file", %{"path" => path, "content" => "new"})
+
+    assert File.read!(path) == "new"
+    assert Bitwise.band(File.stat!(path).mode, 0o777) == 0o755
+    assert File.ls!(dir) == ["script.sh"]
+    File.rm_rf!(dir)
+  end
+
+  test "execute write_file writes in place when the directory is not writable" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_readonly_dir")
+    File.mkdir_p!(dir)
+    path = Path.join(dir, "notes.txt")
+    File.write!(path, "old")
+    File.chmod!(dir, 0o555)
+
+    try do
+      assert {:ok, _} = ToolRegistry.execute("write_file", %{"path" => path, "content" => "new"})
+      assert File.read!(path) == "new"
+      assert File.ls!(dir) == ["notes.txt"]
+    after
+      File.chmod!(dir, 0o755)
+      File.rm_rf!(dir)
+    end
+  end
+
+  test "execute write_file keeps hard links pointing at the same file" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_hard_link")
+    File.mkdir_p!(dir)
+    path = Path.join(dir, "original.txt")
+    link = Path.join(dir, "link.txt")
+    File.write!(path, "old")
+    File.ln!(path, link)
+
+    assert {:ok, _} = ToolRegistry.execute("write_file", %{"path" => path, "content" => "new"})
+    assert File.read!(link) == "new"
+    File.rm_rf!(dir)
+  end
+
   test "execute edit_file replaces content" do
     path = Path.join(System.tmp_dir!(), "harness_test_edit.txt")
     File.write!(path, "hello world")
@@ -96,7 +158,84 @@ defmodule AgentHarness.BuiltinToolsTest do
     File.rm!(path)
   end
 
+  test "execute search_files reports matching lines with line numbers" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_search")
+    File.mkdir_p!(dir)
+    File.write!(Path.join(dir, "a.ex"), "defmodule A do\n  def run, do: :ok\nend\n")
+    File.write!(Path.join(dir, "b.ex"), "defmodule B do\nend\n")
+
+    assert {:ok, output} =
+             ToolRegistry.execute("search_files", %{"pattern" => "^  def ", "path" => dir})
+
+    assert output == "#{Path.join(dir, "a.ex")}:2:   def run, do: :ok"
+
+    assert {:ok, "No matches found."} =
+             ToolRegistry.execute("search_files", %{"pattern" => "defp", "path" => dir})
+
+    File.rm_rf!(dir)
+  end
+
+  test "execute search_files keeps per-line semantics for string anchors" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_search_anchor")
+    File.mkdir_p!(dir)
+    File.write!(Path.join(dir, "a.txt"), "first\nsecond\n")
+
+    assert {:ok, output} =
+             ToolRegistry.execute("search_files", %{"pattern" => "\\Asecond\\z", "path" => dir})
+
+    assert output =~ ":2: second"
+    File.rm_rf!(dir)
+  end
+
+  test "execute search_files skips files with a NUL byte in their first 8KB" do
+    dir = Path.join(System.tmp_dir!(), "harness_test_search_binary")
+    File.mkdir_p!(dir)
+    File.write!(Path.join(dir, "data.bin"), "needle" <> <<0>> <> "needle\n")
+    File.write!(Path.join(dir, "notes.txt"), "needle\n")
+
+    assert {:ok, output} =
+             ToolRegistry.execute("search_files", %{"pattern" => "needle", "path" => dir})
+
+    assert output == "#{Path.join(dir, "notes.txt")}:1: needle"
+    File.rm_rf!(dir)
+  end
+
+  test "execute run_command caps output and reports exit codes" do
+    assert {:ok, "aaaaaaaaaa\n... (output truncated)"} =
+             ToolRegistry.execute("run_command", %{
+               "command" => "head -c 1000000 /dev/zero | tr '\\0' 'a'",
+               "max_output_bytes" => 10
+             })
+
+    assert {:ok, "Exit code 3:\nfail\n"} =
+             ToolRegistry.execute("run_command", %{"command" => "echo fail; exit 3"})
+  end
+
+  test "execute run_command kills the command and its children when it times out" do
+    pid_file = Path.join(System.tmp_dir!(), "harness_test_timeout.pid")
+    File.rm(pid_file)
+
+    assert {:error, "Command timed out after 1 seconds"} =
+             ToolRegistry.execute("run_command", %{
+               "command" => "sleep 30 & echo $! > #{pid_file}; wait; true",
+               "timeout" => 1
+             })
+
+    child_pid = pid_file |> File.read!() |> String.trim()
+    Process.sleep(100)
+    refute os_process_running?(child_pid)
+    File.rm!(pid_file)
+  end
+
   test "execute unknown tool returns error" do
     assert {:error, "Unknown tool: nope"} = ToolRegistry.execute("nope", %{})
   end
+
+  # A killed child whose parent is gone may linger as a zombie until reaped.
+  defp os_process_running?(os_pid) do
+    case File.read("/proc/#{os_pid}/stat") do
+      {:ok, stat} -> not (stat |> String.split(") ") |> List.last() |> String.starts_with?("Z"))
+      {:error, _} -> false
+    end
+  end
 end
@@ -0,0 +1,59 @@
+defmodule AgentHarness.AgentToolBatchTest do
+  use ExUnit.Case, async: false
+
+  alias AgentHarness.Agent
+
+  defmodule ParallelReadAPI do
+    def chat(messages, _tools, _opts) do
+      case List.last(messages) do
+        %{"role" => "user", "content" => [%{"type" => "tool_result"} | _]} ->
+          {:ok, %{"content" => [%{"type" => "text", "text" => "read both"}]}}
+
+        _ ->
+          {:ok,
+           %{
+             "content" => [
+               %{
+                 "type" => "tool_use",
+                 "id" => "read-1",
+                 "name" => "read_file",
+                 "input" => %{"path" => "mix.exs"}
+               },
+               %{
+                 "type" => "tool_use",
+                 "id" => "read-2",
+                 "name" => "read_file",
+                 "input" => %{"path" => "does/not/exist.txt"}
+               }
+             ]
+           }}
+      end
+    end
+  end
+
+  test "concurrent read-only tool calls report results in call order" do
+    {:ok, pid} = Agent.start_supervised(api_module: ParallelReadAPI)
+
+    Agent.chat_async(pid, "read two files")
+
+    assert_receive {:agent_event, _id, {:tool_use, "read_file", %{"path" => "mix.exs"}}}, 1_000
+    assert_receive {:agent_event, _id,
+                    {:tool_use, "read_file", %{"path" => "does/not/exist.txt"}}},
+                   1_000
+
+    assert_receive {:agent_event, _id, {:tool_result, "read_file", first}}, 1_000
+    assert_receive {:agent_event, _id, {:tool_result, "read_file", "[error] " <> _}}, 1_000
+    assert first =~ "defmodule"
+    assert_receive {:agent_event, _id, {:text, "read both"}}, 1_000
+    assert_receive {:agent_event, _id, :done}, 1_000
+
+    results =
+      Enum.find_value(Agent.get_messages(pid), fn
+        %{"role" => "user", "content" => [%{"type" => "tool_result"} | _] = content} -> content
+        _ -> nil
+      end)
+
+    assert [%{"tool_use_id" => "read-1"}, %{"tool_use_id" => "read-2", "is_error" => true}] =
+             results
+  end
+end
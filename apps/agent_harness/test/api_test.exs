@@ -0,0 +1,104 @@
+defmodule AgentHarness.APITest do
+  use ExUnit.Case, async: true
+
+  alias AgentHarness.API
+
+  defp event(type, data) do
+    "event: #{type}\ndata: #{Jason.encode!(Map.put(data, "type", type))}\n\n"
+  end
+
+  defp chat(plug, tools \\ [], opts \\ []) do
+    API.chat(
+      [%{"role" => "user", "content" => "hi"}],
+      tools,
+      [api_key: "test-key", req_options: [plug: plug]] ++ opts
+    )
+  end
+
+  # Sends the decoded request body to the test process and answers with an
+  # empty message.
+  defp capture_request do
+    test_pid = self()
+
+    fn conn ->
+      {:ok, body, conn} = Plug.Conn.read_body(conn)
+      send(test_pid, {:request_body, Jason.decode!(body)})
+
+      Plug.Conn.send_resp(
+        conn,
+        200,
+        event("message_start", %{"message" => %{"content" => []}}) <> event("message_stop", %{})
+      )
+    end
+  end
+
+  test "a streamed 200 response is reassembled into the message" do
+    stream =
+      Enum.join([
+        event("message_start", %{"message" => %{"id" => "msg_1", "content" => []}}),
+        event("content_block_start", %{
+          "index" => 0,
+          "content_block" => %{"type" => "text", "text" => ""}
+        }),
+        event("content_block_delta", %{
+          "index" => 0,
+          "delta" => %{"type" => "text_delta", "text" => "Hi there"}
+        }),
+        event("content_block_stop", %{"index" => 0}),
+        event("message_delta", %{"delta" => %{"stop_reason" => "end_turn"}}),
+        event("message_stop", %{})
+      ])
+
+    plug = fn conn ->
+      conn
+      |> Plug.Conn.put_resp_content_type("text/event-stream")
+      |> Plug.Conn.send_resp(200, stream)
+    end
+
+    assert {:ok, message} = chat(plug)
+    assert message["content"] == [%{"type" => "text", "text" => "Hi there"}]
+    assert message["stop_reason"] == "end_turn"
+  end
+
+  test "an error response reports the status and the decoded body" do
+    plug = fn conn ->
+      conn
+      |> Plug.Conn.put_resp_content_type("application/json")
+      |> Plug.Conn.send_resp(400, ~s({"error":{"message":"bad request"}}))
+    end
+
+    assert {:error, "API returned 400: " <> body} = chat(plug)
+    assert body == inspect(%{"error" => %{"message" => "bad request"}})
+  end
+
+  test "the system prompt and only the last tool are marked as cache breakpoints" do
+    tools = [%{"name" => "first"}, %{"name" => "last"}]
+    assert {:ok, _} = chat(capture_request(), tools, system: "Be brief.")
+    assert_receive {:request_body, body}
+
+    breakpoint = %{"type" => "ephemeral"}
+
+    assert body["system"] == [
+             %{"type" => "text", "text" => "Be brief.", "cache_control" => breakpoint}
+           ]
+
+    assert body["tools"] == [
+             %{"name" => "first"},
+             %{"name" => "last", "cache_control" => breakpoint}
+           ]
+  end
+
+  test "tools and system are left out when there are none" do
+    assert {:ok, _} = chat(capture_request())
+    assert_receive {:request_body, body}
+
+    refute Map.has_key?(body, "tools")
+    refute Map.has_key?(body, "system")
+  end
+
+  test "a non-JSON error body is reported as raw text" do
+    plug = fn conn -> Plug.Conn.send_resp(conn, 502, "Bad Gateway") end
+
+    assert {:error, ~s(API returned 502: "Bad Gateway")} = chat(plug)
+  end
+end
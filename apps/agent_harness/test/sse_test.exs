@@ -0,0 +1,123 @@
+defmodule AgentHarness.SSETest do
+  use ExUnit.Case, async: true
+
+  alias AgentHarness.SSE
+
+  defp event(type, data) do
+    "event: #{type}\ndata: #{Jason.encode!(Map.put(data, "type", type))}\n\n"
+  end
+
+  defp stream do
+    [
+      event("message_start", %{
+        "message" => %{
+          "id" => "msg_1",
+          "role" => "assistant",
+          "content" => [],
+          "usage" => %{"input_tokens" => 10}
+        }
+      }),
+      event("content_block_start", %{
+        "index" => 0,
+        "content_block" => %{"type" => "text", "text" => ""}
+      }),
+      event("ping", %{}),
+      event("content_block_delta", %{
+        "index" => 0,
+        "delta" => %{"type" => "text_delta", "text" => "Hello"}
+      }),
+      event("content_block_delta", %{
+        "index" => 0,
+        "delta" => %{"type" => "text_delta", "text" => " world"}
+      }),
+      event("content_block_stop", %{"index" => 0}),
+      event("content_block_start", %{
+        "index" => 1,
+        "content_block" => %{
+          "type" => "tool_use",
+          "id" => "tu_1",
+          "name" => "read_file",
+          "input" => %{}
+        }
+      }),
+      event("content_block_delta", %{
+        "index" => 1,
+        "delta" => %{"type" => "input_json_delta", "partial_json" => "{\"path\": \"mi"}
+      }),
+      event("content_block_delta", %{
+        "index" => 1,
+        "delta" => %{"type" => "input_json_delta", "partial_json" => "x.exs\"}"}
+      }),
+      event("content_block_stop", %{"index" => 1}),
+      event("message_delta", %{
+        "delta" => %{"stop_reason" => "tool_use"},
+        "usage" => %{"output_tokens" => 7}
+      }),
+      event("message_stop", %{})
+    ]
+    |> Enum.join()
+  end
+
+  test "reassembles text and tool_use blocks into a complete message" do
+    assert {:ok, message} = SSE.new() |> SSE.feed(stream()) |> SSE.finish()
+
+    assert message["stop_reason"] == "tool_use"
+    assert message["usage"] == %{"input_tokens" => 10, "output_tokens" => 7}
+
+    assert message["content"] == [
+             %{"type" => "text", "text" => "Hello world"},
+             %{
+               "type" => "tool_use",
+               "id" => "tu_1",
+               "name" => "read_file",
+               "input" => %{"path" => "mix.exs"}
+             }
+           ]
+  end
+
+  test "handles events split across arbitrary chunk boundaries" do
+    data = stream()
+
+    acc =
+      data
+      |> :binary.bin_to_list()
+      |> Enum.chunk_every(7)
+      |> Enum.reduce(SSE.new(), fn chunk, acc -> SSE.feed(acc, :binary.list_to_bin(chunk)) end)
+
+    assert SSE.finish(acc) == SSE.new() |> SSE.feed(data) |> SSE.finish()
+  end
+
+  test "tool_use without input deltas keeps an empty input" do
+    data =
+      Enum.join([
+        event("message_start", %{"message" => %{"id" => "msg_2", "content" => []}}),
+        event("content_block_start", %{
+          "index" => 0,
+          "content_block" => %{
+            "type" => "tool_use",
+            "id" => "tu_2",
+            "name" => "list_agents",
+            "input" => %{}
+          }
+        }),
+        event("content_block_stop", %{"index" => 0}),
+        event("message_stop", %{})
+      ])
+
+    assert {:ok, %{"content" => [%{"input" => %{}}]}} =
+             SSE.new() |> SSE.feed(data) |> SSE.finish()
+  end
+
+  test "a stream cut off before message_stop is an error" do
+    truncated = stream() |> String.split("event: message_delta") |> hd()
+    assert {:error, "API stream ended before message_stop"} =
+             SSE.new() |> SSE.feed(truncated) |> SSE.finish()
+  end
+
+  test "an error event is surfaced" do
+    data =
+      event("error", %{"error" => %{"type" => "overloaded_error", "message" => "Overloaded"}})
+
+    assert {:error, "API stream error: " <> _} = SSE.new() |> SSE.feed(data) |> SSE.finish()
+  end
+end
@@ -56,6 +56,22 @@ defmodule AgentHarness.ToolSetTest do
     assert {:ok, "dynamic\n"} = ToolSet.execute(table, "echo_tool", %{})
   end
 
+  test "execute caps dynamic tool output at max_output_bytes", %{table: table} do
+    {:ok, _} =
+      ToolSet.register(
+        table,
+        "chatty_tool",
+        "Prints a lot",
+        %{"type" => "object", "properties" => %{}},
+        "#!/bin/sh\nhead -c 100000 /dev/zero | tr '\\0' 'a'"
+      )
+
+    assert {:ok, output} =
+             ToolSet.execute(table, "chatty_tool", %{}, %{max_output_bytes: 10})
+
+    assert output == "aaaaaaaaaa\n... (output truncated)"
+  end
+
   test "execute falls back to built-in", %{table: table} do
     path = Path.join(System.tmp_dir!(), "toolset_test.txt")
     File.write!(path, "via toolset")